@@ -4,22 +4,20 @@
 import sys
 import argparse
 import os
-import io
 import glob
 import re
 import stat
+import errno
 import shutil
 import logging
 import tempfile
 import time
 import traceback
 from pathlib import Path
-from fnmatch import fnmatch
 from collections import Counter
-from types import SimpleNamespace
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from direntry_walk import direntry_walk
-from typing import NamedTuple, Any
+from typing import NamedTuple, Any, Callable
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -30,6 +28,34 @@ class _DebugInfoFilter(logging.Filter):
 	def filter(self, record):
 		return logging.DEBUG <= record.levelno <= logging.INFO
 
+class _StdoutHandler(logging.StreamHandler):
+	'''Logging handler for stdout that only flushes after each record when stdout is a terminal. Otherwise the stream's own buffering batches the (one per file) writes, and the handler is flushed when it is closed.'''
+
+	def __init__(self) -> None:
+		super().__init__(sys.stdout)
+		# stdout (and so the stream) is None under pythonw or in a service without a console
+		isatty = getattr(self.stream, "isatty", None)
+		self.interactive = isatty is not None and isatty()
+
+	def flush(self) -> None:
+		if self.interactive:
+			super().flush()
+
+	def close(self) -> None:
+		super().flush()
+		super().close()
+
+class _StderrHandler(logging.StreamHandler):
+	'''Logging handler for stderr that first flushes stdout, so that output stays in order when both are redirected to the same file.'''
+
+	def __init__(self) -> None:
+		super().__init__(sys.stderr)
+
+	def emit(self, record:logging.LogRecord) -> None:
+		if sys.stdout is not None:
+			sys.stdout.flush()
+		super().emit(record)
+
 class _ArgParser:
 	'''Argument parser for when this python file is run with arguments instead of an imported module.'''
 
@@ -48,6 +74,7 @@ class _ArgParser:
 	parser.add_argument("-R", "--rename-threshold", metavar="size", nargs=1, type=int, default=20000, help="The minimum size in bytes needed to consider renaming files in dst_root to match those in `src_root`. Renamed files below this threshold will be simply deleted in dst_root and their replacements copied over.")
 	parser.add_argument("-m", "--metadata_only", action="store_true", default=False, help="Use only metadata in determining which files in `dst_root` are the result of a rename. Otherwise, the backup process will also compare the last 1kb of files.")
 	parser.add_argument("-d", "--dry-run", action="store_true", default=False, help="Forgo performing any operation that would make a file system change. Changes that would have occurred will still be printed to console.")
+	parser.add_argument("-j", "--jobs", metavar="n", nargs=1, type=int, default=[1], help="The number of worker threads to use for file system operations. Values above 1 will scan `src_root` and `dst_root` concurrently, stat files on a thread pool, and copy new and updated files in parallel, which mostly helps on high-latency file systems (network shares, spinning disks). (Defaults to 1.)")
 
 	parser.add_argument("--log", metavar="path", nargs="?", type=str, default=None, const="auto", help="The path of the log file to use. It will be created if it does not exist. With \"auto\" or no argument, a tempfile will be used for the log, and it will be moved to the user's home directory after the backup is done. If this flag is absent, then no logging will be performed.")
 	parser.add_argument("--debug", action="store_true", default=False, help="Log debug messages.")
@@ -64,11 +91,18 @@ class _ArgParser:
 class _Filter:
 	'''Object that holds a parsed filter string for quicker file filtering.'''
 
-	patterns : list[tuple[bool, re.Pattern]]
+	patterns   : list[tuple[bool, str]]
+	literals   : dict[str, bool]
+	regex      : re.Pattern | None
+	actions    : dict[str, bool]
+	accept_all : bool
 
 	def __init__(self, filter_string:str, *, ignore_hidden:bool = False):
 		self.patterns = []
+		globs : list[str] = [] # the glob behind each entry of self.patterns
 		implicit_dirs : set[str] = set()
+		include_globs : set[str] = set()
+		has_exclude = False
 
 		filter_string = filter_string.strip()
 		for action, patterns in re.findall(r"(\+|-)\s+((?:(?:'[^']*'|\"[^\"]*\"|\S{2,}|[^\s\+-])\s*)+)", filter_string):
@@ -76,6 +110,7 @@ class _Filter:
 			if not action:
 				# clear if - action
 				implicit_dirs = set()
+				has_exclude = True
 			for pattern in re.findall(r"'[^']*'|\"[^\"]*\"|\S{2,}|[^\s\+-]", patterns):
 				if pattern[0] == "'" or pattern[0] == "\"":
 					pattern = pattern[1:-1]
@@ -91,8 +126,10 @@ class _Filter:
 					continue
 
 				regex = glob.translate(pattern, recursive=True, include_hidden=(not ignore_hidden))
-				reobj = re.compile(regex)
-				self.patterns.append((action, reobj))
+				self.patterns.append((action, regex))
+				globs.append(pattern)
+				if action:
+					include_globs.add(pattern)
 
 				# include parent dirs for each include pattern
 				if action:
@@ -104,29 +141,72 @@ class _Filter:
 							break
 						implicit_dirs.add(pattern)
 						regex = glob.translate(pattern + "/", recursive=True, include_hidden=(not ignore_hidden))
-						reobj = re.compile(regex)
-						self.patterns.append((action, reobj))
+						self.patterns.append((action, regex))
+						globs.append(pattern + "/")
+						include_globs.add(pattern + "/")
+
+		# Leading patterns without wildcards (e.g., "+ prefs.js logins.json - **/*/ **/*") each match exactly one
+		# path, so they are looked up in a dict. Only leading ones, since an earlier glob could match first.
+		self.literals = {}
+		literal_count = 0
+		for (action, regex), pattern in zip(self.patterns, globs):
+			if "*" in pattern or "?" in pattern or "[" in pattern:
+				break
+			self.literals.setdefault(pattern.replace("/", os.sep), action)
+			literal_count += 1
+
+		# Combine the other patterns into one alternation so each path is tested with a single match() call.
+		# Alternatives are tried in order, so the named group that matched is the first matching pattern.
+		remaining = list(enumerate(self.patterns))[literal_count:]
+		self.actions = {f"p{i}": action for i, (action, regex) in remaining}
+		if remaining:
+			self.regex = re.compile("|".join(f"(?P<p{i}>{regex})" for i, (action, regex) in remaining))
+		else:
+			self.regex = None
+
+		# Whether every file and directory is included (e.g., the default "+ **/*/ **/*"), in which case
+		# no path needs to be matched. Hidden entries only match wildcards when `ignore_hidden` is off.
+		self.accept_all = (
+			not has_exclude
+			and not ignore_hidden
+			and bool(include_globs & {"**", "**/*"})
+			and bool(include_globs & {"**", "**/*/", "**/"})
+		)
 
 	def filter(self, relpath:str, default:bool = False) -> bool:
 		'''Compare the file path against the filter string.'''
 
-		for action, reobj in self.patterns:
-			if reobj.match(relpath):
-				return action
-		return default
+		if self.accept_all:
+			return True
+		action = self.literals.get(relpath)
+		if action is not None:
+			return action
+		if self.regex is None:
+			return default
+		m = self.regex.match(relpath)
+		if m is None:
+			return default
+		assert m.lastgroup is not None
+		return self.actions[m.lastgroup]
 
 class _Metadata(NamedTuple):
 	'''File metadata that will be used to find probable duplicates.'''
 
 	size  : int
 	mtime : float
+	ino   : int # only used to order copies; 0 where DirEntry.stat() does not provide it (Windows)
+
+	@property
+	def signature(self) -> tuple[int, float]:
+		'''The part of the metadata that is compared when looking for renamed files.'''
+		return (self.size, self.mtime)
 
 class _FileList(NamedTuple):
 	'''File and directory information returned by `_scandir()`.'''
 
 	root             : Path
 	relpath_to_stats : dict[str, _Metadata]
-	real_names       : dict[str, str]
+	real_names       : dict[str, str] # only holds relpaths that os.path.normcase() changed, so it stays empty on POSIX; read with .get(p, p)
 	empty_dirs       : set[str]
 	#nonempty_dirs   : set[str]
 	visited_inodes   : set[int]
@@ -134,6 +214,14 @@ class _FileList(NamedTuple):
 class Results:
 	'''Various statistics and other information returned by `sync()`.'''
 
+	__slots__ = (
+		"trash_root", "log_file", "success", "errors",
+		"create_success", "rename_success", "update_success", "delete_success",
+		"create_error", "rename_error", "update_error", "delete_error",
+		"byte_diff",
+		"dir_create_success", "dir_create_error", "dir_delete_success", "dir_delete_error",
+	)
+
 	def __init__(self) -> None:
 		self.trash_root : Path | None = None
 		self.log_file   : Path | None = None
@@ -173,6 +261,7 @@ def sync_cmd(args:list[str]) -> Results:
 		rename_threshold = parsed_args.rename_threshold[0],
 		metadata_only    = parsed_args.metadata_only,
 		dry_run          = parsed_args.dry_run,
+		jobs             = parsed_args.jobs[0],
 		log              = parsed_args.log,
 		debug            = parsed_args.debug,
 		quiet            = parsed_args.quiet,
@@ -190,6 +279,7 @@ def sync(
 		rename_threshold : int | None  = 10000,
 		metadata_only    : bool = False,
 		dry_run          : bool = False,
+		jobs             : int  = 1,
 		log              : str | os.PathLike[str] | None = None,
 		debug            : bool = False,
 		quiet            : bool = False,
@@ -209,6 +299,7 @@ def sync(
 		rename_threshold (int)   : The minimum size in bytes needed to consider renaming files in `dst` that were renamed in `src`. Renamed files below this threshold will be simply deleted in `dst` and their replacements created. A value of `None` will mean no files in `dst` will be eligible for renaming. (Defaults to `10000`.)
 		metadata_only (bool)     : Whether to use only metadata in determining which files in `dst` are the result of a rename. Otherwise, the backup process will also compare the last 1kb of files. (Defaults to `False`.)
 		dry_run (bool)           : Whether to hold off performing any operation that would make a file system change. Changes that would have occurred will still be printed to console. (Defaults to `False`.)
+		jobs (int)               : The number of worker threads to use for file system operations. Values above 1 will scan `src` and `dst` concurrently, stat files on a thread pool, and copy new and updated files in parallel, which mostly helps on high-latency file systems (network shares, spinning disks). (Defaults to `1`.)
 
 		log (str or PathLike)    : The path of the log file to use. It will be created if it does not exist. A value of "auto" means a tempfile will be used for the log, and it will be copied to the user's home directory after the backup is done. A value of `None` will skip logging to a file. (Defaults to `None`.)
 		debug (bool)             : Whether to log debug messages. (Default to `False`.)
@@ -255,7 +346,7 @@ def sync(
 		quiet = True
 
 	if not quiet:
-		handler_stdout = logging.StreamHandler(sys.stdout)
+		handler_stdout = _StdoutHandler()
 		handler_stdout.setFormatter(logging.Formatter("%(message)s"))
 		handler_stdout.addFilter(_DebugInfoFilter())
 		if debug:
@@ -265,45 +356,28 @@ def sync(
 		logger.addHandler(handler_stdout)
 
 	if not veryquiet:
-		handler_stderr = logging.StreamHandler(sys.stderr)
+		handler_stderr = _StderrHandler()
 		handler_stderr.setFormatter(logging.Formatter("%(message)s"))
 		handler_stderr.setLevel(logging.WARNING)
 		logger.addHandler(handler_stderr)
 
 	try:
-		if not isinstance(src, (str, os.PathLike)):
-			msg = f"Bad type for arg 'src' (expected str or PathLike): {src}"
-			raise TypeError(msg)
-		if not isinstance(dst, (str, os.PathLike)):
-			msg = f"Bad type for arg 'dst' (expected str or PathLike): {dst}"
-			raise TypeError(msg)
-		if trash is not None and not isinstance(trash, (str, os.PathLike)):
-			msg = f"Bad type for arg 'trash' (expected str or PathLike): {trash}"
-			raise TypeError(msg)
-		if not isinstance(filter, str):
-			msg = f"Bad type for arg 'filter' (expected str): {filter}"
-			raise TypeError(msg)
-		if not isinstance(ignore_hidden, bool):
-			msg = f"Bad type for arg 'ignore_hidden' (expected bool): {ignore_hidden}"
-			raise TypeError(msg)
-		if rename_threshold is not None and not isinstance(rename_threshold, int):
-			msg = f"Bad type for arg 'rename_threshold' (expected int): {rename_threshold}"
-			raise TypeError(msg)
-		if not isinstance(metadata_only, bool):
-			msg = f"Bad type for arg 'metadata_only' (expected bool): {metadata_only}"
-			raise TypeError(msg)
-		if not isinstance(dry_run, bool):
-			msg = f"Bad type for arg 'dry_run' (expected bool): {dry_run}"
-			raise TypeError(msg)
-		if log is not None and not isinstance(log, (str, os.PathLike)):
-			msg = f"Bad type for arg 'log' (expected str or PathLike): {log}"
-			raise TypeError(msg)
-		if not isinstance(quiet, bool):
-			msg = f"Bad type for arg 'quiet' (expected bool): {quiet}"
-			raise TypeError(msg)
-		if not isinstance(veryquiet, bool):
-			msg = f"Bad type for arg 'veryquiet' (expected bool): {veryquiet}"
-			raise TypeError(msg)
+		_check_arg_types(
+			src              = src,
+			dst              = dst,
+			trash            = trash,
+			filter           = filter,
+			ignore_hidden    = ignore_hidden,
+			follow_symlinks  = follow_symlinks,
+			rename_threshold = rename_threshold,
+			metadata_only    = metadata_only,
+			dry_run          = dry_run,
+			jobs             = jobs,
+			log              = log,
+			debug            = debug,
+			quiet            = quiet,
+			veryquiet        = veryquiet,
+		)
 
 		src_root = Path(src)
 		dst_root = Path(dst)
@@ -340,6 +414,9 @@ def sync(
 		if log_file is not None and os.path.exists(log_file):
 			msg = f"Chosen log already exists: {log_file}"
 			raise ValueError(msg)
+		if jobs < 1:
+			msg = f"jobs must be at least 1: {jobs}"
+			raise ValueError(msg)
 
 		if not dry_run:
 			os.makedirs(dst_root, exist_ok=True)
@@ -367,85 +444,72 @@ def sync(
 				handler_file.setLevel(logging.INFO)
 			logger.addHandler(handler_file)
 
-		logger.debug(f"Starting backup: {src_root=} {dst_root=} {trash_root=} {filter=} {ignore_hidden=} {follow_symlinks=} {rename_threshold=} {dry_run=} {log_file=} {debug=} {quiet=} {veryquiet=}")
+		logger.debug(f"Starting backup: {src_root=} {dst_root=} {trash_root=} {filter=} {ignore_hidden=} {follow_symlinks=} {rename_threshold=} {dry_run=} {jobs=} {log_file=} {debug=} {quiet=} {veryquiet=}")
 
 		width = max(len(str(src_root)), len(str(dst_root))) + 3
 		logger.info("   " + str(src_root))
 		logger.info("-> " + str(dst_root))
 		logger.info("-" * width)
 
-		src_files = _scandir(src_root, filter=filter, ignore_hidden=ignore_hidden, follow_symlinks=follow_symlinks)
-		dst_files = _scandir(dst_root, filter=filter, ignore_hidden=ignore_hidden, follow_symlinks=follow_symlinks)
-
-		for op, src_file, dst_file, byte_diff, summary in _operations(
-			src_files,
-			dst_files,
-			trash_root       = trash_root,
-			rename_threshold = rename_threshold,
-			metadata_only    = metadata_only
-		):
-			logger.info(summary)
+		if jobs > 1:
+			# The two trees are independent (and often on different drives), so scan them concurrently
+			with ThreadPoolExecutor(max_workers=2) as executor:
+				src_future = executor.submit(_scandir, src_root, filter=filter, ignore_hidden=ignore_hidden, follow_symlinks=follow_symlinks, jobs=jobs)
+				dst_future = executor.submit(_scandir, dst_root, filter=filter, ignore_hidden=ignore_hidden, follow_symlinks=follow_symlinks, jobs=jobs)
+				src_files = src_future.result()
+				dst_files = dst_future.result()
+		else:
+			src_files = _scandir(src_root, filter=filter, ignore_hidden=ignore_hidden, follow_symlinks=follow_symlinks)
+			dst_files = _scandir(dst_root, filter=filter, ignore_hidden=ignore_hidden, follow_symlinks=follow_symlinks)
+
+		# With jobs > 1, creates and updates are copied on a thread pool. They are the last file operations
+		# generated, and any pending copies are waited on before the next non-copy operation runs, so copies
+		# never race with deletes, renames, or directory changes.
+		copier = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 and not dry_run else None
+		pending_copies : dict[str, tuple[Future, str, int]] = {}
+		# Directories that moves and copies have already ensured exist. Each one receives a file that stays
+		# there for the rest of the run, so the empty-directory cleanup in _move() never deletes a cached one.
+		made_dirs      : set[Path] = set()
+		# checked once, before any data is copied, since the last step of _copy_new_file() can fail for a whole system
+		use_tmpfile = not dry_run and _supports_tmpfile(dst_root)
+		context = _OpContext(dst_root=dst_root, follow_symlinks=follow_symlinks, made_dirs=made_dirs, use_tmpfile=use_tmpfile)
+		try:
+			for op, src_file, dst_file, byte_diff, summary in _operations(
+				src_files,
+				dst_files,
+				trash_root       = trash_root,
+				rename_threshold = rename_threshold,
+				metadata_only    = metadata_only,
+				jobs             = jobs,
+				summaries        = _is_handled(logger, logging.INFO),
+			):
+				if summary is not None:
+					logger.info(summary)
+
+				if not dry_run:
+					op_handler = _OP_HANDLERS[op]
+					if copier is not None and (op == "+" or op == "U"):
+						# keyed by lowercase path so two names of one file on a case-insensitive file system are not copied at once
+						dst_key = str(dst_file).lower()
+						if dst_key in pending_copies:
+							_wait_for_copies(pending_copies, results)
+						pending_copies[dst_key] = (copier.submit(op_handler, src_file, dst_file, context), op, byte_diff)
+						# bounds memory on large first backups, and reports failed copies as they happen
+						_wait_for_copies(pending_copies, results, max_pending=_MAX_PENDING_COPIES_PER_JOB * jobs)
+						continue
+					if pending_copies:
+						_wait_for_copies(pending_copies, results)
 
-			if not dry_run:
-				if op == "-":
-					try:
-						_move(src_file, dst_file, delete_empty_dirs_under=dst_root)
-						results.delete_success += 1
-						results.byte_diff += byte_diff
-					except OSError as e:
-						results.delete_error += 1
-						msg = _error_summary(e)
-						logger.error(msg)
-						results.errors.append(msg)
-				elif op == "+":
 					try:
-						_copy(src_file, dst_file, follow_symlinks=follow_symlinks)
-						results.create_success += 1
-						results.byte_diff += byte_diff
+						op_handler(src_file, dst_file, context)
+						_record_op(results, op, byte_diff, None)
 					except OSError as e:
-						results.create_error += 1
-						msg = _error_summary(e)
-						logger.error(msg)
-						results.errors.append(msg)
-				elif op == "U":
-					try:
-						_copy(src_file, dst_file, follow_symlinks=follow_symlinks)
-						results.update_success += 1
-						results.byte_diff += byte_diff
-					except OSError as e:
-						results.update_error += 1
-						msg = _error_summary(e)
-						logger.error(msg)
-						results.errors.append(msg)
-				elif op == "R":
-					try:
-						_move(src_file, dst_file, delete_empty_dirs_under=dst_root)
-						results.rename_success += 1
-					except OSError as e:
-						results.rename_error += 1
-						msg = _error_summary(e)
-						logger.error(msg)
-						results.errors.append(msg)
-				elif op == "D+":
-					try:
-						os.makedirs(dst_file, exist_ok=True)
-						results.dir_create_success += 1
-					except OSError as e:
-						results.dir_create_error += 1
-						msg = _error_summary(e)
-						logger.error(msg)
-						results.errors.append(msg)
-				elif op == "D-":
-					try:
-						_delete_empty_dirs(src_file, root=dst_root)
-						results.dir_delete_success += 1
-					except OSError as e:
-						results.dir_delete_error += 1
-						msg = _error_summary(e)
-						logger.error(msg)
-						results.errors.append(msg)
-				else:
-					assert False
+						_record_op(results, op, byte_diff, e)
+
+			_wait_for_copies(pending_copies, results)
+		finally:
+			if copier is not None:
+				copier.shutdown(cancel_futures=True)
 
 		logger.info("")
 		logger.info("*** psync finished successfully. ***")
@@ -488,6 +552,7 @@ def sync(
 
 		if handler_stdout:
 			logger.removeHandler(handler_stdout)
+			handler_stdout.close()
 
 		if handler_stderr:
 			logger.removeHandler(handler_stderr)
@@ -501,7 +566,110 @@ def sync(
 
 	return results
 
-def _scandir(root:Path, *, filter:str = "+ **/*/ **/*", ignore_hidden:bool = False, follow_symlinks:bool = False) -> _FileList:
+# Accepted types of each `sync()` argument, along with how they are described in error messages.
+_SYNC_ARG_TYPES : dict[str, tuple[tuple[type, ...], str]] = {
+	"src"              : ((str, os.PathLike),            "str or PathLike"),
+	"dst"              : ((str, os.PathLike),            "str or PathLike"),
+	"trash"            : ((str, os.PathLike, type(None)), "str or PathLike"),
+	"filter"           : ((str,),                        "str"),
+	"ignore_hidden"    : ((bool,),                       "bool"),
+	"follow_symlinks"  : ((bool,),                       "bool"),
+	"rename_threshold" : ((int, type(None)),             "int"),
+	"metadata_only"    : ((bool,),                       "bool"),
+	"dry_run"          : ((bool,),                       "bool"),
+	"jobs"             : ((int,),                        "int"),
+	"log"              : ((str, os.PathLike, type(None)), "str or PathLike"),
+	"debug"            : ((bool,),                       "bool"),
+	"quiet"            : ((bool,),                       "bool"),
+	"veryquiet"        : ((bool,),                       "bool"),
+}
+
+def _check_arg_types(**kwargs:object) -> None:
+	'''Raises a `TypeError` for the first argument whose type is not accepted by `_SYNC_ARG_TYPES`.'''
+
+	for name, value in kwargs.items():
+		types, expected = _SYNC_ARG_TYPES[name]
+		if not isinstance(value, types):
+			msg = f"Bad type for arg '{name}' (expected {expected}): {value}"
+			raise TypeError(msg)
+
+class _OpContext(NamedTuple):
+	'''The per-run arguments that operation handlers need besides their source and destination.'''
+
+	dst_root        : Path
+	follow_symlinks : bool
+	made_dirs       : set[Path]
+	use_tmpfile     : bool = False # whether `_supports_tmpfile(dst_root)`
+
+def _move_file(src:Path, dst:Path, context:_OpContext) -> None:
+	_move(src, dst, delete_empty_dirs_under=context.dst_root, made_dirs=context.made_dirs)
+
+def _create_file(src:Path, dst:Path, context:_OpContext) -> None:
+	_copy(src, dst, new_file=True, follow_symlinks=context.follow_symlinks, made_dirs=context.made_dirs, use_tmpfile=context.use_tmpfile)
+
+def _update_file(src:Path, dst:Path, context:_OpContext) -> None:
+	_copy(src, dst, follow_symlinks=context.follow_symlinks, made_dirs=context.made_dirs)
+
+def _create_dir(src:None, dst:Path, context:_OpContext) -> None:
+	os.makedirs(dst, exist_ok=True)
+
+def _delete_dir(src:Path, dst:None, context:_OpContext) -> None:
+	_delete_empty_dirs(src, root=context.dst_root)
+
+# Operation (as generated by `_operations()`) -> function that performs it
+_OP_HANDLERS : dict[str, Callable[[Any, Any, _OpContext], None]] = {
+	"-"  : _move_file, # into the trash
+	"R"  : _move_file,
+	"+"  : _create_file,
+	"U"  : _update_file,
+	"D+" : _create_dir,
+	"D-" : _delete_dir,
+}
+
+# Operation -> names of the `Results` counters for its successes and errors
+_OP_COUNTERS : dict[str, tuple[str, str]] = {
+	"-"  : ("delete_success",     "delete_error"),
+	"R"  : ("rename_success",     "rename_error"),
+	"+"  : ("create_success",     "create_error"),
+	"U"  : ("update_success",     "update_error"),
+	"D+" : ("dir_create_success", "dir_create_error"),
+	"D-" : ("dir_delete_success", "dir_delete_error"),
+}
+
+def _record_op(results:Results, op:str, byte_diff:int, error:OSError | None) -> None:
+	'''Records the outcome of an operation in `results`.'''
+
+	success_counter, error_counter = _OP_COUNTERS[op]
+	if error is None:
+		setattr(results, success_counter, getattr(results, success_counter) + 1)
+		results.byte_diff += byte_diff
+	else:
+		setattr(results, error_counter, getattr(results, error_counter) + 1)
+		msg = _error_summary(error)
+		logger.error(msg)
+		results.errors.append(msg)
+
+# Copies that sync() lets queue up on the thread pool, per worker thread, before it waits for some to finish
+_MAX_PENDING_COPIES_PER_JOB = 4
+
+def _wait_for_copies(pending_copies:dict[str, tuple[Future, str, int]], results:Results, *, max_pending:int = 0) -> None:
+	'''Waits for the copies submitted to the thread pool in `sync()` until at most `max_pending` are left (none by default). The outcomes of finished copies are recorded in `results`, and they are removed from `pending_copies`.'''
+
+	if len(pending_copies) <= max_pending:
+		return
+	if max_pending:
+		wait([future for future, _, _ in pending_copies.values()], return_when=FIRST_COMPLETED)
+	for dst_key, (future, op, byte_diff) in list(pending_copies.items()):
+		if max_pending and not future.done():
+			continue
+		try:
+			future.result()
+			_record_op(results, op, byte_diff, None)
+		except OSError as e:
+			_record_op(results, op, byte_diff, e)
+		del pending_copies[dst_key]
+
+def _scandir(root:Path, *, filter:str = "+ **/*/ **/*", ignore_hidden:bool = False, follow_symlinks:bool = False, jobs:int = 1) -> _FileList:
 	'''
 	Retrieves file information for all files under `root`, including relative paths (relative to `root`), sizes, and mtimes.
 
@@ -510,6 +678,7 @@ def _scandir(root:Path, *, filter:str = "+ **/*/ **/*", ignore_hidden:bool = Fal
 		filter (str)           : The filter to include/exclude files and directories. Include file system entries by preceding a space-separated list with "+", and exclude with "-". Included files will be copied, while included directories will be searched. Each pattern ending with a slash will only apply to directories. Otherise the pattern will only apply to files. (Defaults to `+ **/*/ **/*`.)
 		ignore_hidden (bool)   : Whether to skip hidden files by default. If `True`, then wildcards in glob patterns will not match file system entries beginning with a dot. However, globs containing a dot (e.g., "**/.*") will still match these file system entries. (Defaults to `False`.)
 		follow_symlinks (bool) : Whether to follow symbolic links under `root`. Note that `root` itself will be followed regardless of this argument. (Defaults to `False`.)
+		jobs (int)             : The number of threads used to stat files. Directories are still listed in order by the calling thread. (Defaults to `1`.)
 	'''
 
 	file_list = _FileList(
@@ -521,193 +690,269 @@ def _scandir(root:Path, *, filter:str = "+ **/*/ **/*", ignore_hidden:bool = Fal
 	)
 	f = _Filter(filter, ignore_hidden=ignore_hidden)
 
-	for dir, subdirnames, file_entries in direntry_walk(root, followlinks=follow_symlinks):
-		logger.debug(f"scanning: {dir}")
-
-		if follow_symlinks:
-			inode = os.stat(dir).st_ino
-			if inode in file_list.visited_inodes:
-				raise ValueError(f"Symlink circular reference: {dir}")
-			file_list.visited_inodes.add(inode)
+	# directories are listed by this thread, while stat calls (one per file) are farmed out
+	executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+	# futures for directories handed to the executor, and plain results for those stat-ed in place
+	pending : list[Future | list[tuple[str, _Metadata]]] = []
 
-		# sorting may be needed if _listdir is changed to yield folder-by-folder
-		#subdirnames.sort()
-		#file_entries.sort()
+	# every dir yielded by direntry_walk is `root_str` joined with its relative path,
+	# so relative paths can be sliced off instead of calling os.path.relpath per entry
+	root_str = os.fspath(root)
+	root_prefix_len = len(os.path.join(root_str, ""))
 
-		dir_relpath = os.path.relpath(dir, root)
-		normed_dir_relpath = os.path.normcase(dir_relpath)
-
-		# catalog empty directory
-		if dir_relpath != "." and not file_entries and not subdirnames and f.filter(dir_relpath + os.sep):
-			file_list.empty_dirs.add(normed_dir_relpath)
-			file_list.real_names[normed_dir_relpath] = dir_relpath
-			continue
-		#else:
-		#	self.nonempty_dirs.add(dir_relpath)
+	try:
+		for dir, subdirnames, file_entries in direntry_walk(root_str, followlinks=follow_symlinks):
+			logger.debug("scanning: %s", dir)
+
+			if follow_symlinks:
+				inode = os.stat(dir).st_ino
+				if inode in file_list.visited_inodes:
+					raise ValueError(f"Symlink circular reference: {dir}")
+				file_list.visited_inodes.add(inode)
+
+			# sorting may be needed if _listdir is changed to yield folder-by-folder
+			#subdirnames.sort()
+			#file_entries.sort()
+
+			if dir == root_str:
+				dir_relpath = "."
+				relpath_prefix = ""
+			else:
+				dir_relpath = dir[root_prefix_len:]
+				relpath_prefix = dir_relpath + os.sep
+			normed_dir_relpath = os.path.normcase(dir_relpath)
+
+			# catalog empty directory
+			if dir_relpath != "." and not file_entries and not subdirnames and f.filter(dir_relpath + os.sep):
+				file_list.empty_dirs.add(normed_dir_relpath)
+				if normed_dir_relpath != dir_relpath:
+					file_list.real_names[normed_dir_relpath] = dir_relpath
+				continue
+			#else:
+			#	self.nonempty_dirs.add(dir_relpath)
 
-		# prune search tree
-		i = 0
-		while i < len(subdirnames):
+			# prune search tree (in place, since direntry_walk recurses into what is left in the list)
 			# symlinks are encountered here but they aren't followed unless followlinks is True
-			subdirname = subdirnames[i]
-			subdir_path = os.path.join(dir, subdirname)
-			subdir_relpath = os.path.relpath(subdir_path, root)
-			if not f.filter(subdir_relpath + os.sep):
-				del subdirnames[i]
-				continue
-			i += 1
-
-		# prune files
-		for entry in file_entries:
-			filename = entry.name
-			file_path = os.path.join(dir, filename)
-			file_relpath = os.path.relpath(file_path, root)
-			normed_file_relpath = os.path.normcase(file_relpath)
-			if (f.filter(file_relpath)):
-				stat = entry.stat(follow_symlinks=follow_symlinks)
-				meta = _Metadata(size = stat.st_size, mtime = stat.st_mtime)
-				file_list.relpath_to_stats[normed_file_relpath] = meta
-				file_list.real_names[normed_file_relpath] = file_relpath
+			subdirnames[:] = [subdirname for subdirname in subdirnames if f.filter(relpath_prefix + subdirname + os.sep)]
+
+			# prune files
+			if executor is None:
+				_add_files(file_list, _stat_files(file_entries, relpath_prefix, f, follow_symlinks))
+			elif len(file_entries) < _MIN_FILES_PER_TASK:
+				# not worth a task; kept in order with the others
+				pending.append(_stat_files(file_entries, relpath_prefix, f, follow_symlinks))
+			else:
+				pending.append(executor.submit(_stat_files, file_entries, relpath_prefix, f, follow_symlinks))
+
+		# merged in submission order so the result is the same as a single-threaded scan
+		for stats in pending:
+			_add_files(file_list, stats.result() if isinstance(stats, Future) else stats)
+	finally:
+		if executor is not None:
+			executor.shutdown(cancel_futures=True)
 
 	return file_list
 
+# Directories with fewer files than this are stat-ed by the scanning thread, since handing them to a worker
+# costs more than the stat calls it would overlap
+_MIN_FILES_PER_TASK = 8
+
+def _stat_files(file_entries:list[os.DirEntry], relpath_prefix:str, f:_Filter, follow_symlinks:bool) -> list[tuple[str, _Metadata]]:
+	'''Filters the file entries of a single directory and returns the relative paths and metadata of the included files.'''
+
+	stats : list[tuple[str, _Metadata]] = []
+	# bound once, since this loop runs for every file in the tree
+	include = f.filter
+	accept_all = f.accept_all
+	append = stats.append
+	for entry in file_entries:
+		file_relpath = relpath_prefix + entry.name
+		if accept_all or include(file_relpath):
+			stat = entry.stat(follow_symlinks=follow_symlinks)
+			append((file_relpath, _Metadata(stat.st_size, stat.st_mtime, stat.st_ino)))
+	return stats
+
+def _add_files(file_list:_FileList, stats:list[tuple[str, _Metadata]]) -> None:
+	'''Records the output of `_stat_files()` in `file_list`.'''
+
+	normcase = os.path.normcase
+	relpath_to_stats = file_list.relpath_to_stats
+	real_names = file_list.real_names
+	for file_relpath, meta in stats:
+		normed_file_relpath = normcase(file_relpath)
+		relpath_to_stats[normed_file_relpath] = meta
+		if normed_file_relpath != file_relpath:
+			real_names[normed_file_relpath] = file_relpath
+
 def _operations(
 		src_files        : _FileList,
 		dst_files        : _FileList,
 		*,
 		trash_root       : Path | None,
 		rename_threshold : int  | None,
-		metadata_only    : bool
+		metadata_only    : bool,
+		jobs             : int  = 1,
+		summaries        : bool = True,
 	):
-	'''Generator of file system operations to perform for this backup.'''
+	'''Generator of file system operations to perform for this backup. With `jobs` > 1, the file tails of rename candidates are read concurrently. With `summaries` off, the summary line of each operation is `None` instead of a formatted string.'''
 
 	assert trash_root is None or isinstance(trash_root, Path)
 
 	src_relpath_stats = src_files.relpath_to_stats
 	dst_relpath_stats = dst_files.relpath_to_stats
 
-	src_relpaths = set(src_relpath_stats.keys())
-	dst_relpaths = set(dst_relpath_stats.keys())
-	logger.debug(f"{src_relpaths=}")
-	logger.debug(f"{dst_relpaths=}")
-
-	src_only_relpaths = sorted(src_relpaths.difference(dst_relpaths))
-	dst_only_relpaths = sorted(dst_relpaths.difference(src_relpaths))
-	both_relpaths     = sorted(src_relpaths.intersection(dst_relpaths))
-	logger.debug(f"{src_only_relpaths=}")
-	logger.debug(f"{dst_only_relpaths=}")
-	logger.debug(f"{both_relpaths=}")
+	src_relpaths = src_relpath_stats.keys()
+	dst_relpaths = dst_relpath_stats.keys()
+	# lazy %-formatting, since these reprs can be huge and debug logging is usually off
+	logger.debug("src_relpaths=%r", src_relpaths)
+	logger.debug("dst_relpaths=%r", dst_relpaths)
+
+	# Set operations on the key views directly. Only dst-only paths are sorted by name here, since renames and
+	# deletes are emitted in that order; creates and updates are sorted later in the order they are copied.
+	src_only_relpaths = src_relpaths - dst_relpaths
+	dst_only_relpaths = sorted(dst_relpaths - src_relpaths)
+	both_relpaths     = src_relpaths & dst_relpaths
+	logger.debug("src_only_relpaths=%r", src_only_relpaths)
+	logger.debug("dst_only_relpaths=%r", dst_only_relpaths)
+	logger.debug("both_relpaths=%r", both_relpaths)
 
 	# Delete empty directories now in case any new files needs to take their places
 	dst_only_empty_dirs = dst_files.empty_dirs.difference(src_files.empty_dirs)#.difference(src_files.empty_dirs)
 	for relpath in dst_only_empty_dirs:
-		dst_relpath_real = dst_files.real_names[relpath]
+		dst_relpath_real = dst_files.real_names.get(relpath, relpath)
 		src = dst_files.root / dst_relpath_real
-		assert not any(src.iterdir())
-		yield ("D-", src, None, 0, f"- {dst_relpath_real}{os.sep}")
+		assert _is_empty_dir(src)
+		yield ("D-", src, None, 0, f"- {dst_relpath_real}{os.sep}" if summaries else None)
 
 	# Rename files
 	if rename_threshold is not None:
-		src_only_relpath_from_stats = _reverse_dict({path:src_relpath_stats[path] for path in src_only_relpaths})
-		dst_only_relpath_from_stats = _reverse_dict({path:dst_relpath_stats[path] for path in dst_only_relpaths})
+		# Small files are never renamed, so leave them out before reversing. The size is part of the signature,
+		# so this does not change which of the remaining signatures are unique.
+		src_candidates = {path:src_relpath_stats[path].signature for path in src_only_relpaths if src_relpath_stats[path].size >= rename_threshold}
+		dst_candidates = {path:dst_relpath_stats[path].signature for path in dst_only_relpaths if dst_relpath_stats[path].size >= rename_threshold}
+	else:
+		src_candidates = dst_candidates = {}
 
-		for dst_relpath in list(dst_only_relpaths): # dst_only_relpaths is changed inside the loop
-			# Ignore small files
-			if dst_relpath_stats[dst_relpath].size < rename_threshold:
-				continue
-			try:
-				rename_to = src_only_relpath_from_stats[dst_relpath_stats[dst_relpath]]
-				# Ignore if there are multiple candidates
-				if rename_to is None:
-					continue
+	if src_candidates and dst_candidates:
+		src_only_relpath_from_stats = _reverse_dict(src_candidates)
+		dst_only_relpath_from_stats = _reverse_dict(dst_candidates)
 
-				rename_from = dst_only_relpath_from_stats[dst_relpath_stats[dst_relpath]]
-				# Ignore if there are multiple candidates
-				if rename_from is None:
-					continue
+		renamed_src_relpaths : set[str] = set()
+		renamed_dst_relpaths : set[str] = set()
 
-				# Ignore if last 1kb do not match
-				if not metadata_only:
-					on_dst = dst_files.root / rename_from
-					on_src = src_files.root / rename_to
-					if not _last_bytes(on_src) == _last_bytes(on_dst):
-						continue
+		# signatures shared by multiple files on either side were already dropped by _reverse_dict()
+		candidates : list[tuple[str, str, int]] = []
+		for signature, rename_from in dst_only_relpath_from_stats.items():
+			# Ignore if there are no candidates (dst file not a result of a rename) or multiple candidates
+			rename_to = src_only_relpath_from_stats.get(signature)
+			if rename_to is None:
+				continue
+			candidates.append((rename_from, rename_to, signature[0]))
+
+		# Ignore if last 1kb do not match
+		if not metadata_only and candidates:
+			on_srcs = [src_files.root / rename_to for rename_from, rename_to, size in candidates]
+			on_dsts = [dst_files.root / rename_from for rename_from, rename_to, size in candidates]
+			sizes   = [size for rename_from, rename_to, size in candidates]
+			if jobs > 1 and len(candidates) > 1:
+				# each check is two small reads, so keeping several in flight hides the per-read latency
+				with ThreadPoolExecutor(max_workers=jobs) as executor:
+					matches = list(executor.map(_same_tail, on_srcs, on_dsts, sizes))
+			else:
+				matches = list(map(_same_tail, on_srcs, on_dsts, sizes))
+			candidates = [candidate for candidate, match in zip(candidates, matches) if match]
 
-				src_only_relpaths.remove(rename_to)
-				dst_only_relpaths.remove(rename_from)
+		for rename_from, rename_to, size in candidates:
+			renamed_src_relpaths.add(rename_to)
+			renamed_dst_relpaths.add(rename_from)
 
-				rename_from = dst_files.real_names[rename_from]
-				rename_to = src_files.real_names[rename_to]
+			rename_from = dst_files.real_names.get(rename_from, rename_from)
+			rename_to = src_files.real_names.get(rename_to, rename_to)
 
-				src = dst_files.root / rename_from
-				dst = dst_files.root / rename_to
+			src = dst_files.root / rename_from
+			dst = dst_files.root / rename_to
 
-				yield ("R", src, dst, 0, f"R {rename_from} -> {rename_to}")
+			yield ("R", src, dst, 0, f"R {rename_from} -> {rename_to}" if summaries else None)
 
-			except KeyError:
-				# dst file not a result of a rename
-				continue
+		if renamed_src_relpaths:
+			src_only_relpaths -= renamed_src_relpaths
+			dst_only_relpaths = [relpath for relpath in dst_only_relpaths if relpath not in renamed_dst_relpaths]
+
+	# The per-file loops below build paths by concatenating onto these prefixes, which skips the joining
+	# logic of `Path.__truediv__` (relpaths are already normalized by `_scandir()`)
+	src_prefix = os.path.join(src_files.root, "")
+	dst_prefix = os.path.join(dst_files.root, "")
 
 	# Delete files
 	if trash_root is not None:
+		trash_prefix = os.path.join(trash_root, "")
 		for dst_relpath in dst_only_relpaths:
-			dst_relpath_real = dst_files.real_names[dst_relpath]
-			src = dst_files.root / dst_relpath_real
-			dst = trash_root     / dst_relpath_real
+			dst_relpath_real = dst_files.real_names.get(dst_relpath, dst_relpath)
+			src = Path(dst_prefix   + dst_relpath_real)
+			dst = Path(trash_prefix + dst_relpath_real)
 			byte_diff = -dst_relpath_stats[dst_relpath].size
-			yield ("-", src, dst, byte_diff, f"- {dst_relpath_real}")
+			yield ("-", src, dst, byte_diff, f"- {dst_relpath_real}" if summaries else None)
 
 	# Create files
-	for src_relpath in src_only_relpaths:
-		src_relpath_real = src_files.real_names[src_relpath]
-		src = src_files.root / src_relpath_real
-		dst = dst_files.root / src_relpath_real
+	# Copy in inode order, which roughly follows on-disk layout and cuts down on seeking (ties are broken by path)
+	for src_relpath in sorted(src_only_relpaths, key=lambda p: (src_relpath_stats[p].ino, p)):
+		src_relpath_real = src_files.real_names.get(src_relpath, src_relpath)
+		src = Path(src_prefix + src_relpath_real)
+		dst = Path(dst_prefix + src_relpath_real)
 		byte_diff = src_relpath_stats[src_relpath].size
-		yield ("+", src, dst, byte_diff, f"+ {src_relpath_real}")
+		yield ("+", src, dst, byte_diff, f"+ {src_relpath_real}" if summaries else None)
 
 	# Update files that have newer mtimes
-	for relpath in both_relpaths:
-		src_relpath_real = src_files.real_names[relpath]
-		dst_relpath_real = dst_files.real_names[relpath]
-		src = src_files.root / src_relpath_real
-		dst = dst_files.root / dst_relpath_real
-		byte_diff = src_relpath_stats[relpath].size - dst_relpath_stats[relpath].size
-		src_time = src_relpath_stats[relpath].mtime
-		dst_time = dst_relpath_stats[relpath].mtime
+	# Most files in a typical backup are unchanged, so those are dropped before sorting into copy order,
+	# and paths are only built for the ones being updated
+	changed_relpaths = [relpath for relpath in both_relpaths if src_relpath_stats[relpath].mtime != dst_relpath_stats[relpath].mtime]
+	for relpath in sorted(changed_relpaths, key=lambda p: (src_relpath_stats[p].ino, p)):
+		src_meta = src_relpath_stats[relpath]
+		dst_meta = dst_relpath_stats[relpath]
+		src_time = src_meta.mtime
+		dst_time = dst_meta.mtime
 		if src_time > dst_time:
-			yield ("U", src, dst, byte_diff, f"U {dst_relpath_real}")
+			src_relpath_real = src_files.real_names.get(relpath, relpath)
+			dst_relpath_real = dst_files.real_names.get(relpath, relpath)
+			src = Path(src_prefix + src_relpath_real)
+			dst = Path(dst_prefix + dst_relpath_real)
+			byte_diff = src_meta.size - dst_meta.size
+			yield ("U", src, dst, byte_diff, f"U {dst_relpath_real}" if summaries else None)
 		elif src_time < dst_time:
 			logger.warning(f"Working copy is older than backed-up copy, skipping update: {relpath}")
 
 	# Create empty directories
 	src_only_empty_dirs = src_files.empty_dirs.difference(dst_files.empty_dirs)#.difference(dst_files.nonempty_dirs)
 	for relpath in src_only_empty_dirs:
-		src_relpath_real = src_files.real_names[relpath]
+		src_relpath_real = src_files.real_names.get(relpath, relpath)
 		dst = dst_files.root / src_relpath_real
-		yield ("D+", None, dst, 0, f"+ {src_relpath_real}{os.sep}")
+		yield ("D+", None, dst, 0, f"+ {src_relpath_real}{os.sep}" if summaries else None)
 
 def _reverse_dict(old_dict:dict[Any, Any]) -> dict[Any, Any]:
 	'''
-	Reverses a `dict` by swapping keys and values. If a value in `old_dict` appears more than once, then the corresponding key in the reversed `dict` will point to a `None`.
+	Reverses a `dict` by swapping keys and values. Values that appear more than once in `old_dict` are left out of the reversed `dict`.
 
 	>>> _reverse_dict({"a":1, "b":2, "c":2})[1]
 	'a'
-	>>> _reverse_dict({"a":1, "b":2, "c":2})[2] is None
-	True
+	>>> 2 in _reverse_dict({"a":1, "b":2, "c":2})
+	False
 	'''
 
-	reversed:dict[Any, Any] = {}
-	for key, val in old_dict.items():
-		if val in reversed:
-			reversed[val] = None
-		else:
-			reversed[val] = key
-	return reversed
+	counts = Counter(old_dict.values())
+	return {val:key for key, val in old_dict.items() if counts[val] == 1}
 
-def _copy(src:Path, dst:Path, *, exist_ok:bool = True, follow_symlinks:bool = False) -> None:
-	'''Copy file from `src` to `dst`, keeping timestamp metadata. Existing files will be overwritten if `exist_ok` is `True`. Otherwise this method will raise a `FileExistsError`.'''
+def _copy(src:Path, dst:Path, *, exist_ok:bool = True, new_file:bool = False, follow_symlinks:bool = False, made_dirs:set[Path] | None = None, use_tmpfile:bool = False) -> None:
+	'''
+	Copy file from `src` to `dst`, keeping timestamp metadata. Existing files will be overwritten if `exist_ok` is `True`. Otherwise this method will raise a `FileExistsError`.
+
+	If `new_file` is `True`, the caller already knows that `dst` does not exist (e.g., it was absent from the scan of `dst`), so the checks on an existing `dst` are skipped.
+
+	If `made_dirs` is supplied, then it is used as a cache of directories known to exist, which saves a `mkdir` call for each subsequent file in the same directory.
+
+	If `new_file` and `use_tmpfile` are both `True` (see `_supports_tmpfile()`), then `dst` is created with `_copy_new_file()` where possible.
+	'''
 
-	if dst.exists():
+	if not new_file and dst.exists():
 		if not exist_ok:
 			raise FileExistsError(f"Cannot copy, dst exists: {src} -> {dst}")
 		if not dst.is_file():
@@ -715,13 +960,17 @@ def _copy(src:Path, dst:Path, *, exist_ok:bool = True, follow_symlinks:bool = Fa
 		elif src.samefile(dst):
 			raise FileExistsError(f"Same file: {src} -> {dst}")
 
+	if new_file and use_tmpfile:
+		_make_parent_dir(dst, made_dirs)
+		if _copy_new_file(src, dst, follow_symlinks=follow_symlinks):
+			return
+
 	delete_tmp = False
 	dst_tmp = dst.with_name(dst.name + ".tempcopy")
 	try:
 		# Copy into a temp file, with metadata
-		dir = dst.parent
-		dir.mkdir(parents=True, exist_ok=True)
-		shutil.copy2(src, dst_tmp, follow_symlinks=follow_symlinks)
+		_make_parent_dir(dst, made_dirs)
+		_copy_file(src, dst_tmp, follow_symlinks=follow_symlinks)
 		delete_tmp = True
 		try:
 			# Rename the temp file into the dest file
@@ -745,30 +994,186 @@ def _copy(src:Path, dst:Path, *, exist_ok:bool = True, follow_symlinks:bool = Fa
 		if delete_tmp:
 			dst_tmp.unlink() # same as os.remove
 
-def _move(src:Path, dst:Path, *, exist_ok:bool = False, delete_empty_dirs_under:Path|None = None) -> None:
+def _copy_file(src:Path, dst:Path, *, follow_symlinks:bool = False) -> None:
+	'''
+	Equivalent of `shutil.copy2(src, dst)`. On Linux, the data is copied inside the kernel (`copy_file_range`, falling back to `sendfile`). The kernel is also told that `src` will be read once from start to end (larger readahead), and its pages are dropped from the page cache afterwards so a large backup does not evict more useful cached data.
+	'''
+
+	# Elsewhere, shutil.copy2 already uses the platform's native copy routine.
+	# (A literal sys.platform check, so that type checkers skip the Linux-only calls below on other platforms.)
+	if sys.platform != "linux":
+		shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+		return
+
+	src_fd = _open_regular_file(src, follow_symlinks=follow_symlinks)
+	if src_fd is None:
+		shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+		return
+
+	try:
+		os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+		with open(dst, "wb") as fdst:
+			_copy_contents(src_fd, fdst.fileno())
+		os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+	finally:
+		os.close(src_fd)
+	shutil.copystat(src, dst, follow_symlinks=follow_symlinks)
+
+def _open_regular_file(src:Path, *, follow_symlinks:bool = False) -> int | None:
+	'''
+	Opens `src` for reading and returns its file descriptor, or `None` if it is not a regular file (a symlink that should not be followed, or a FIFO, socket, or device). Those are left to `shutil.copy2()`, which copies symlinks as symlinks and refuses FIFOs with a `SpecialFileError`.
+
+	`O_NONBLOCK` keeps the open from waiting for a writer on a FIFO. It has no effect on reading regular files.
+	'''
+
+	if sys.platform != "linux":
+		return None
+
+	try:
+		fd = os.open(src, os.O_RDONLY | os.O_NONBLOCK | (0 if follow_symlinks else os.O_NOFOLLOW))
+	except OSError as e:
+		if e.errno == errno.ELOOP:
+			return None
+		raise
+	if not stat.S_ISREG(os.fstat(fd).st_mode):
+		os.close(fd)
+		return None
+	return fd
+
+def _copy_new_file(src:Path, dst:Path, *, follow_symlinks:bool = False) -> bool:
+	'''
+	Copies `src` to `dst`, which must not exist, by writing an unnamed file (`O_TMPFILE`) in the directory of `dst` and linking it into place once its data and metadata are complete. A failed or interrupted copy never leaves a partial file or a ".tempcopy" behind.
+
+	Returns `False` if `src` is not a regular file (e.g., a symlink that should not be followed, or a FIFO) or the file system of `dst` does not support `O_TMPFILE` (or linking it into place), in which case the caller should copy another way.
+	'''
+
+	if sys.platform != "linux":
+		return False
+
+	src_fd = _open_regular_file(src, follow_symlinks=follow_symlinks)
+	if src_fd is None:
+		return False
+
+	try:
+		try:
+			tmp_fd = os.open(dst.parent, os.O_WRONLY | os.O_TMPFILE, 0o600)
+		except OSError as e:
+			if e.errno in (errno.EOPNOTSUPP, errno.EISDIR, errno.EINVAL):
+				return False
+			raise
+
+		try:
+			os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+			_copy_contents(src_fd, tmp_fd)
+			os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+			tmp_path = f"/proc/self/fd/{tmp_fd}"
+			# src is known not to be a symlink here (or is meant to be followed), and tmp_path has to be followed
+			shutil.copystat(src, tmp_path)
+			try:
+				os.link(tmp_path, dst, follow_symlinks=True)
+			except OSError as e:
+				# /proc does not allow linking the file (e.g., some sandboxes), which _supports_tmpfile() normally rules out up front
+				if e.errno != errno.EXDEV:
+					raise
+				return False
+		finally:
+			os.close(tmp_fd)
+	finally:
+		os.close(src_fd)
+	return True
+
+def _supports_tmpfile(dir:Path) -> bool:
+	'''Whether unnamed files (`O_TMPFILE`) can be created in `dir` and then linked into place through /proc, as `_copy_new_file()` does. A probe file is briefly linked into `dir` to find out.'''
+
+	if sys.platform != "linux":
+		return False
+
+	try:
+		tmp_fd = os.open(dir, os.O_WRONLY | os.O_TMPFILE, 0o600)
+	except OSError:
+		# e.g., EOPNOTSUPP when the file system does not support O_TMPFILE
+		return False
+
+	probe = dir / f".psync-tmpfile-probe.{os.getpid()}"
+	try:
+		os.link(f"/proc/self/fd/{tmp_fd}", probe, follow_symlinks=True)
+	except OSError:
+		# e.g., EXDEV when /proc does not allow it, or ENOENT without /proc
+		return False
+	else:
+		probe.unlink()
+		return True
+	finally:
+		os.close(tmp_fd)
+
+def _copy_contents(src_fd:int, dst_fd:int) -> None:
+	'''Copies the data of an open file to another, inside the kernel where possible.'''
+
+	copied = 0
+	# Try the zero-copy routes first. Each one falls through to the next if it fails before copying anything.
+	if sys.platform == "linux":
+		blocksize = min(max(os.fstat(src_fd).st_size, 2 ** 23), 2 ** 30)
+		if hasattr(os, "copy_file_range"): # needs glibc 2.27+ when Python was built
+			# can clone extents on copy-on-write file systems (Btrfs, XFS) and copy server-side on NFS/SMB
+			try:
+				while (sent := os.copy_file_range(src_fd, dst_fd, blocksize, copied)) > 0:
+					copied += sent
+			except OSError:
+				# e.g., EXDEV on older kernels, or not supported by the file system
+				if copied:
+					raise
+		if not copied:
+			try:
+				while (sent := os.sendfile(dst_fd, src_fd, copied, blocksize)) > 0:
+					copied += sent
+			except OSError:
+				# some file systems do not support sendfile
+				if copied:
+					raise
+	if not copied:
+		with open(src_fd, "rb", closefd=False) as fsrc, open(dst_fd, "wb", closefd=False) as fdst:
+			shutil.copyfileobj(fsrc, fdst)
+
+def _move(src:Path, dst:Path, *, exist_ok:bool = False, delete_empty_dirs_under:Path|None = None, made_dirs:set[Path] | None = None) -> None:
 	'''
 	Move file from `src` to `dst`. Existing files will be overwritten if `exist_ok` is `True`. Otherwise this method will raise a `FileExistsError`.
 
 	If `delete_empty_dirs_under` is supplied, then any empty directories created during this file move (and under this root directory) will be deleted.
-	'''
 
-	if dst.exists():
-		if not exist_ok:
-			raise FileExistsError(f"Cannot move, dst exists: {src} -> {dst}")
-		if not dst.is_file():
-			raise FileExistsError(f"Cannot move, dst is not a file: {src} -> {dst}")
-		elif src.samefile(dst):
-			raise FileExistsError(f"Same file: {src} -> {dst}")
+	If `made_dirs` is supplied, then it is used as a cache of directories known to exist (see `_copy()`).
+	'''
 
-	# move the file
-	dir = dst.parent
-	dir.mkdir(exist_ok=True, parents=True)
-	src.replace(dst)
+	if os.name == "nt" and not exist_ok:
+		# os.rename() never overwrites on Windows (it raises FileExistsError), so let it do the existence check
+		_make_parent_dir(dst, made_dirs)
+		src.rename(dst)
+	else:
+		if dst.exists():
+			if not exist_ok:
+				raise FileExistsError(f"Cannot move, dst exists: {src} -> {dst}")
+			if not dst.is_file():
+				raise FileExistsError(f"Cannot move, dst is not a file: {src} -> {dst}")
+			elif src.samefile(dst):
+				raise FileExistsError(f"Same file: {src} -> {dst}")
+
+		# move the file
+		_make_parent_dir(dst, made_dirs)
+		src.replace(dst)
 
 	# delete empty directories left after the move
 	if delete_empty_dirs_under is not None:
 		_delete_empty_dirs(src.parent, root=delete_empty_dirs_under)
 
+def _make_parent_dir(path:Path, made_dirs:set[Path] | None) -> None:
+	'''Creates the parent directory of `path` (and its ancestors) unless `made_dirs` says it already exists.'''
+
+	dir = path.parent
+	if made_dirs is not None and dir in made_dirs:
+		return
+	dir.mkdir(parents=True, exist_ok=True)
+	if made_dirs is not None:
+		made_dirs.add(dir)
+
 def _delete_empty_dirs(dir:Path, *, root:Path) -> None:
 	'''Iteratively delete empty directories, starting with `dir` and moving up to (but not including) `root`.'''
 
@@ -779,22 +1184,46 @@ def _delete_empty_dirs(dir:Path, *, root:Path) -> None:
 	#if any(dir.iterdir()):
 	#	raise ValueError(f"Dir is not empty: {dir}")
 	try:
-		while dir != root and not any(dir.iterdir()):
+		while dir != root and _is_empty_dir(dir):
 			relpath = dir.relative_to(root)
-			logger.debug(f"- {relpath}{os.sep}")
+			logger.debug("- %s%s", relpath, os.sep)
 			dir.rmdir()
 			dir = dir.parent
 	except OSError as e:
 		logger.warning(str(e))
 
-def _last_bytes(file_path:Path, n:int = 1024) -> bytes:
-	'''Reads and returns the last `n` bytes of a file.'''
+def _is_empty_dir(dir:Path) -> bool:
+	'''Checks whether `dir` has no entries. Unlike `Path.iterdir()`, this stops reading after the first entry instead of listing the whole directory.'''
 
-	file_size = file_path.stat().st_size
-	bytes_to_read = file_size if n > file_size else n
-	with file_path.open("rb") as f:
-		f.seek(-bytes_to_read, os.SEEK_END)
-		return f.read()
+	with os.scandir(dir) as entries:
+		return next(entries, None) is None
+
+def _same_tail(file_path1:Path, file_path2:Path, file_size:int) -> bool:
+	'''Whether two files of size `file_size` end with the same bytes.'''
+
+	return _last_bytes(file_path1, file_size) == _last_bytes(file_path2, file_size)
+
+def _last_bytes(file_path:Path, file_size:int, n:int = 1024) -> bytes:
+	'''
+	Reads and returns the last `n` bytes of a file, given its size from the scan (which saves a stat call).
+
+	If the file has changed size since it was scanned, the bytes returned will not be its current tail, so they
+	will not match the other candidate's and the rename will be skipped.
+	'''
+
+	bytes_to_read = min(n, file_size)
+
+	if sys.platform == "win32": # no pread
+		with file_path.open("rb") as f:
+			f.seek(file_size - bytes_to_read)
+			return f.read(bytes_to_read)
+
+	# open + pread, without the buffered file object
+	fd = os.open(file_path, os.O_RDONLY)
+	try:
+		return os.pread(fd, bytes_to_read, file_size - bytes_to_read)
+	finally:
+		os.close(fd)
 
 def _human_readable_size(n:int) -> str:
 	'''
@@ -830,6 +1259,21 @@ def _error_summary(e):
 		msg = f"{error_type}: {error_message}"
 	return msg
 
+def _is_handled(logger:logging.Logger, level:int) -> bool:
+	'''Whether a record of `level` logged to `logger` would reach a handler, either its own or one it propagates to. Handler filters are not consulted.'''
+
+	if not logger.isEnabledFor(level):
+		return False
+	current : logging.Logger | None = logger
+	while current is not None:
+		if any(level >= handler.level for handler in current.handlers):
+			return True
+		if not current.propagate:
+			break
+		current = current.parent
+	# logging.lastResort only prints warnings and above
+	return level >= logging.WARNING
+
 def main() -> None:
 	try:
 		sync_cmd(sys.argv[1:])
@@ -1,11 +1,16 @@
 import io
 import os
+import sys
+import errno
+import shutil
 import time
 import contextlib
 import hashlib
+import logging
 import tempfile
 import traceback
 import unittest
+from unittest import mock
 import doctest
 from pathlib import Path
 
@@ -87,6 +92,7 @@ class TestBackup(unittest.TestCase):
 		self.assertTrue(f.filter("__pycache__/"))
 		self.assertTrue(f.filter("a/__pycache__/"))
 		self.assertTrue(f.filter("a/b/__pycache__/"))
+		self.assertTrue(f.accept_all)
 
 		f = psync._Filter("+ **/*")
 		self.assertTrue(f.filter("a"))
@@ -98,8 +104,12 @@ class TestBackup(unittest.TestCase):
 		self.assertTrue(f.filter("__pycache__/"))
 		self.assertTrue(f.filter("a/__pycache__/"))
 		self.assertTrue(f.filter("a/b/__pycache__/"))
+		self.assertTrue(f.accept_all)
+		self.assertTrue(psync._Filter("+ **/*/ **/*").accept_all)
+		self.assertFalse(psync._Filter("+ **/*/ **/*", ignore_hidden=True).accept_all)
 
 		f = psync._Filter("- **/.*/ **/__pycache__/ + **/*/ **/*")
+		self.assertFalse(f.accept_all)
 		self.assertTrue(f.filter("a"))
 		self.assertTrue(f.filter("a/b"))
 		self.assertTrue(f.filter("a/b/c"))
@@ -118,6 +128,7 @@ class TestBackup(unittest.TestCase):
 		self.assertTrue(f.filter("prefs.js"))
 		self.assertFalse(f.filter("storage.sqlite"))
 		self.assertFalse(f.filter("storage/"))
+		self.assertEqual(len(f.literals), 5)
 
 		f = psync._Filter("+ audio/music/**/*.flac - **/*/ **/*")
 		self.assertTrue(f.filter("audio/"))
@@ -243,6 +254,20 @@ class TestBackup(unittest.TestCase):
 
 			################################################################################
 
+			# every directory here is smaller than _MIN_FILES_PER_TASK, so lower it to have them all stat-ed by workers
+			with mock.patch.object(psync, "_MIN_FILES_PER_TASK", 1):
+				files_parallel = psync._scandir(
+					root = test_root,
+					filter = "- b/ c/ + **/*/ **/1.???",
+					jobs = 4,
+				)
+			# the results of the workers are merged in the order the directories were scanned
+			self.assertEqual(list(files_parallel.relpath_to_stats.items()), list(files.relpath_to_stats.items()))
+			self.assertEqual(files_parallel.real_names, files.real_names)
+			self.assertEqual(files_parallel.empty_dirs, files.empty_dirs)
+
+			################################################################################
+
 			files = psync._scandir(
 				root = test_root,
 				filter = "+ a/a?/a?b/*",
@@ -405,6 +430,151 @@ class TestBackup(unittest.TestCase):
 
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+	@unittest.skipUnless(sys.platform == "linux", "O_TMPFILE is Linux only")
+	def test_copy_new_file(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			test_root = Path(temp_root)
+			create_file_structure(test_root, {"src": {"1.txt": ("info", 1000)}, "dst": {}})
+			src = test_root / "src" / "1.txt"
+			dst_dir = test_root / "dst"
+			if not psync._supports_tmpfile(dst_dir):
+				self.skipTest("unnamed files cannot be linked into place here")
+			self.assertEqual(os.listdir(dst_dir), [])
+
+			self.assertTrue(psync._copy_new_file(src, dst_dir / "1.txt"))
+			self.assertEqual((dst_dir / "1.txt").read_text(), "info")
+			self.assertEqual(os.stat(dst_dir / "1.txt").st_mtime, 1000)
+			with self.assertRaises(FileExistsError):
+				psync._copy_new_file(src, dst_dir / "1.txt")
+
+	@unittest.skipUnless(sys.platform == "linux", "O_TMPFILE is Linux only")
+	def test_copy_new_file_fallback(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			test_root = Path(temp_root)
+			create_file_structure(test_root, {"src": {"1.txt": ("info", 1000)}, "dst": {}})
+			src = test_root / "src" / "1.txt"
+			dst_dir = test_root / "dst"
+
+			# /proc does not allow linking the unnamed file
+			exdev = OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+			with mock.patch("os.link", side_effect=exdev):
+				self.assertFalse(psync._supports_tmpfile(dst_dir))
+				self.assertFalse(psync._copy_new_file(src, dst_dir / "1.txt"))
+				psync._copy(src, dst_dir / "2.txt", new_file=True, use_tmpfile=True)
+
+			# the file system does not support O_TMPFILE
+			os_open = os.open
+			def open_without_tmpfile(path, flags, *args, **kwargs):
+				if flags & os.O_TMPFILE == os.O_TMPFILE:
+					raise OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+				return os_open(path, flags, *args, **kwargs)
+			with mock.patch("os.open", side_effect=open_without_tmpfile):
+				self.assertFalse(psync._supports_tmpfile(dst_dir))
+				self.assertFalse(psync._copy_new_file(src, dst_dir / "1.txt"))
+				psync._copy(src, dst_dir / "3.txt", new_file=True, use_tmpfile=True)
+
+			# a named pipe is left to the fallback (which refuses it) instead of blocking the open
+			os.mkfifo(test_root / "src" / "pipe")
+			self.assertFalse(psync._copy_new_file(test_root / "src" / "pipe", dst_dir / "pipe"))
+			with self.assertRaises(shutil.SpecialFileError):
+				psync._copy(test_root / "src" / "pipe", dst_dir / "pipe", new_file=True, use_tmpfile=True)
+
+			self.assertEqual(sorted(os.listdir(dst_dir)), ["2.txt", "3.txt"])
+			self.assertEqual((dst_dir / "2.txt").read_text(), "info")
+			self.assertEqual((dst_dir / "3.txt").read_text(), "info")
+			self.assertEqual(os.stat(dst_dir / "3.txt").st_mtime, 1000)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	def test_sync_args(self):
+		self.assertEqual(psync._ArgParser.parse(["src", "dst"]).jobs, [1])
+		self.assertEqual(psync._ArgParser.parse(["src", "dst", "-j", "4"]).jobs, [4])
+
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			test_root = Path(temp_root)
+			create_file_structure(test_root, {"src": {"1.txt": None}})
+			src = test_root / "src"
+			dst = test_root / "dst"
+
+			# input errors are reported through the results instead of raised
+			with contextlib.redirect_stderr(io.StringIO()):
+				results = psync.sync(src, dst, quiet=True, jobs=0)
+				self.assertFalse(results.success)
+				results = psync.sync(src, dst, quiet=True, jobs="4")
+				self.assertFalse(results.success)
+				results = psync.sync(src, dst, quiet=True, jobs=1.5)
+				self.assertFalse(results.success)
+				results = psync.sync(src, dst, quiet=True, follow_symlinks=1)
+				self.assertFalse(results.success)
+				results = psync.sync(src, dst, quiet=True, debug="yes")
+				self.assertFalse(results.success)
+			self.assertFalse(dst.exists())
+
+		with self.assertRaises(TypeError):
+			psync._check_arg_types(follow_symlinks=None)
+		with self.assertRaises(TypeError):
+			psync._check_arg_types(debug=1)
+		with self.assertRaises(TypeError):
+			psync._check_arg_types(jobs="4")
+		with self.assertRaises(TypeError):
+			psync._check_arg_types(jobs=None)
+		psync._check_arg_types(follow_symlinks=True, debug=False, jobs=4)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	def test_logging(self):
+		class ListHandler(logging.Handler):
+			def __init__(self):
+				super().__init__()
+				self.messages = []
+			def emit(self, record):
+				self.messages.append(record.getMessage())
+
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			test_root = Path(temp_root)
+			create_file_structure(test_root, {"src": {"1.txt": None}})
+
+			# an application's own handlers still receive the operations when sync() prints nothing,
+			# and the level it gave the psync logger is left alone
+			app_handler = ListHandler()
+			root_logger = logging.getLogger()
+			root_logger.addHandler(app_handler)
+			psync.logger.setLevel(logging.INFO)
+			try:
+				results = psync.sync(test_root / "src", test_root / "dst", quiet=True)
+			finally:
+				root_logger.removeHandler(app_handler)
+				level = psync.logger.level
+				psync.logger.setLevel(logging.DEBUG)
+			self.assertTrue(results.success)
+			self.assertIn("+ 1.txt", app_handler.messages)
+			self.assertEqual(level, logging.INFO)
+
+			# operation summaries are only formatted when some handler will use them
+			test_logger = logging.getLogger("psync_test_logger")
+			test_logger.setLevel(logging.DEBUG)
+			test_logger.propagate = False
+			self.assertFalse(psync._is_handled(test_logger, logging.INFO))
+			test_handler = ListHandler()
+			test_handler.setLevel(logging.WARNING)
+			test_logger.addHandler(test_handler)
+			self.assertFalse(psync._is_handled(test_logger, logging.INFO))
+			self.assertTrue(psync._is_handled(test_logger, logging.WARNING))
+			test_logger.propagate = True
+			root_logger.addHandler(app_handler)
+			try:
+				self.assertTrue(psync._is_handled(test_logger, logging.INFO))
+			finally:
+				root_logger.removeHandler(app_handler)
+				test_logger.removeHandler(test_handler)
+
+			# no console (e.g., pythonw), where sys.stdout and sys.stderr are None
+			with contextlib.redirect_stdout(None), contextlib.redirect_stderr(None):
+				results = psync.sync(test_root / "src", test_root / "dst2", trash="auto")
+			self.assertTrue(results.success)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 	def test_backup(self):
 		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
 			test_root = Path(temp_root)
@@ -508,6 +678,85 @@ class TestBackup(unittest.TestCase):
 			self.assertFalse(hash_directory(dst2) == hash_dst2_old)
 			self.assertEqual(hash_directory(src2), hash_directory(dst2))
 			self.assertEqual(results.create_success, 4)
+
+			################################################################################
+
+			# test backup with worker threads
+			dst3 = test_root / "dst3"
+			results = psync.sync(
+				src,
+				dst3,
+				quiet = True,
+				jobs = 4,
+			)
+			self.assertTrue(results.success)
+			self.assertEqual(hash_directory(src), hash_directory(dst3))
+			self.assertEqual(results.create_success, 4)
+
+			################################################################################
+
+			# test backup with more copies than are allowed to be pending at once
+			src4 = test_root / "src4"
+			dst4 = test_root / "dst4"
+			create_file_structure(src4, {f"{i}.txt": str(i) for i in range(50)})
+			results = psync.sync(
+				src4,
+				dst4,
+				quiet = True,
+				jobs = 2,
+			)
+			self.assertTrue(results.success)
+			self.assertEqual(hash_directory(src4), hash_directory(dst4))
+			self.assertEqual(results.create_success, 50)
+
+			################################################################################
+
+			# test backup with a named pipe, which is reported as an error instead of blocking the copy
+			if hasattr(os, "mkfifo"):
+				src5 = test_root / "src5"
+				dst5 = test_root / "dst5"
+				create_file_structure(src5, {"1.txt": "info"})
+				os.mkfifo(src5 / "pipe")
+				results = psync.sync(
+					src5,
+					dst5,
+					veryquiet = True,
+				)
+				self.assertTrue(results.success)
+				self.assertEqual(results.create_success, 1)
+				self.assertEqual(results.create_error, 1)
+				self.assertEqual(os.listdir(dst5), ["1.txt"])
+
+			################################################################################
+
+			# test renames with worker threads, where the file tails of the candidates are compared concurrently
+			src6 = test_root / "src6"
+			dst6 = test_root / "dst6"
+			create_file_structure(src6, {
+				"a.bin": ("a" * 20000, 1000),
+				"b.bin": ("b" * 20000, 2000),
+				"c.bin": ("c" * 20000, 3000),
+			})
+			results = psync.sync(src6, dst6, quiet=True)
+			self.assertTrue(results.success)
+			(src6 / "a.bin").rename(src6 / "a2.bin")
+			(src6 / "sub").mkdir()
+			(src6 / "b.bin").rename(src6 / "sub" / "b2.bin")
+			# same size and mtime as c.bin, but a different tail, so it is not a rename
+			(src6 / "c.bin").unlink()
+			create_file_structure(src6, {"c2.bin": ("c" * 19999 + "d", 3000)})
+			results = psync.sync(
+				src6,
+				dst6,
+				trash = "auto",
+				quiet = True,
+				jobs = 4,
+			)
+			self.assertTrue(results.success)
+			self.assertEqual(results.rename_success, 2)
+			self.assertEqual(results.create_success, 1)
+			self.assertEqual(results.delete_success, 1)
+			self.assertEqual(hash_directory(src6), hash_directory(dst6))
 		assert not test_root.exists()
 
 		################################################################################